@@ -12,38 +12,80 @@ What You'll Learn:
 Prerequisites: You should know Flask basics (routes, templates, render_template)
 """
 
-from flask import Flask, render_template
+from flask import Flask, render_template, g
 import sqlite3  # Built-in Python library for SQLite database
+import queue
 
 app = Flask(__name__)
 
 DATABASE = 'students.db'  # Database file name (will be created automatically)
 
+# Open connections waiting to be reused. The dev server starts a new thread for
+# every request, so connections are kept here (shared) rather than per thread.
+_pool = queue.Queue(maxsize=5)
+
+# SQL used by the routes. Each connection remembers (caches) the prepared form of
+# SQL text it has already run, so reusing the exact same text skips re-parsing it.
+SELECT_STUDENTS_SQL = 'SELECT * FROM students'
+INSERT_STUDENT_SQL = 'INSERT INTO students (name, email, course) VALUES (?, ?, ?)'
+
 
 # =============================================================================
 # DATABASE HELPER FUNCTIONS
 # =============================================================================
 
 def get_db_connection():
-    """Create a connection to the database"""
-    conn = sqlite3.connect(DATABASE)  # Connect to database file
+    """Return the database connection for the current request"""
+    if 'db' in g:  # g = storage that lives for one request
+        return g.db
+
+    try:
+        conn = _pool.get_nowait()  # Borrow an already-open connection
+    except queue.Empty:
+        conn = open_db_connection()  # None free - open a new one
+    g.db = conn
+    return conn
+
+
+def open_db_connection():
+    """Open a new connection to the database file (the PRAGMAs run only here, once per connection)"""
+    conn = sqlite3.connect(DATABASE, check_same_thread=False, timeout=30,
+                           cached_statements=256)  # Connect to database file
     conn.row_factory = sqlite3.Row  # This allows accessing columns by name (like dict)
+    conn.execute('PRAGMA journal_mode=WAL')  # Readers don't wait for writers (saved in the .db file)
+    conn.execute('PRAGMA synchronous=NORMAL')  # One disk sync per commit instead of two (safe with WAL)
+    conn.execute('PRAGMA temp_store=MEMORY')  # Temporary tables/indexes live in RAM
+    conn.execute('PRAGMA mmap_size=134217728')  # Read the file through 128 MB of memory-mapped I/O
     return conn
 
 
+@app.teardown_appcontext
+def release_db_connection(exception):
+    """End of request: undo anything left half-done, then hand the connection back to the pool"""
+    conn = g.pop('db', None)
+    if conn is None:
+        return
+    if exception is not None or conn.in_transaction:
+        conn.rollback()  # The next request must not inherit uncommitted changes
+    try:
+        _pool.put_nowait(conn)  # Next request reuses it (and its prepared-statement cache)
+    except queue.Full:
+        conn.close()  # Pool already has enough spare connections
+
+
 def init_db():
     """Create the table if it doesn't exist"""
-    conn = get_db_connection()
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS students (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            email TEXT NOT NULL,
-            course TEXT NOT NULL
-        )
-    ''')  # SQL command to create table with 4 columns
-    conn.commit()  # Save changes to database
-    conn.close()  # Close connection
+    with app.app_context():  # get_db_connection() uses g, which needs an app context
+        conn = get_db_connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS students (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                email TEXT NOT NULL,
+                course TEXT NOT NULL
+            )
+        ''')  # SQL command to create table with 4 columns
+        conn.commit()  # Save changes to database (the connection stays open for reuse)
 
 
 # =============================================================================
@@ -53,9 +95,8 @@ def init_db():
 @app.route('/')
 def index():
     """Home page - Display all students from database"""
-    conn = get_db_connection()  # Step 1: Connect to database
-    students = conn.execute('SELECT * FROM students').fetchall()  # Step 2: Get all rows
-    conn.close()  # Step 3: Close connection
+    conn = get_db_connection()  # Step 1: Get the (already open) connection
+    students = conn.execute(SELECT_STUDENTS_SQL).fetchall()  # Step 2: Get all rows
     return render_template('index.html', students=students)
 
 
@@ -64,14 +105,27 @@ def add_sample_student():
     """Add a sample student to database (for testing)"""
     conn = get_db_connection()
     conn.execute(
-        'INSERT INTO students (name, email, course) VALUES (?, ?, ?)',
+        INSERT_STUDENT_SQL,
         ('Jane Doe', 'jane@example.com', 'Python')  # ? are placeholders (safe from SQL injection)
     )
     conn.commit()  # Don't forget to commit!
-    conn.close()
     return 'Student added! <a href="/">Go back to home</a>'
 
 
+@app.route('/add_many')
+def add_sample_students():
+    """Add several sample students with ONE executemany call (one statement, one commit)"""
+    rows = [
+        ('John Smith', 'john@example.com', 'Flask'),
+        ('Asha Rao', 'asha@example.com', 'SQL'),
+        ('Carlos Diaz', 'carlos@example.com', 'Python'),
+    ]
+    conn = get_db_connection()
+    conn.executemany(INSERT_STUDENT_SQL, rows)
+    conn.commit()
+    return f'{len(rows)} students added! <a href="/">Go back to home</a>'
+
+
 if __name__ == '__main__':
     init_db()  # Create table when app starts
     app.run(debug=True)
@@ -86,12 +140,14 @@ if __name__ == '__main__':
 #    - Perfect for learning and small projects
 #
 # 2. Connection Flow:
-#    connect → execute SQL → commit (if changing data) → close
+#    connect (once per thread) → execute SQL → commit (if changing data)
+#    Opening a connection is slow, so get_db_connection() keeps it open and reuses it
 #
 # 3. SQL Commands Used:
 #    - CREATE TABLE: Define table structure
 #    - SELECT * FROM: Get all data
 #    - INSERT INTO: Add new data
+#    - executemany(): Run the same INSERT for a whole list of rows at once
 #
 # 4. row_factory = sqlite3.Row:
 #    - Without this: row[0], row[1] (access by index)
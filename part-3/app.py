@@ -15,7 +15,11 @@ Install: pip install flask-sqlalchemy
 
 from flask import Flask, render_template, request, redirect, url_for, flash
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import desc
+from sqlalchemy import desc, event, exists
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.orm import joinedload, contains_eager
+from functools import wraps
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key'
@@ -23,7 +27,25 @@ app.secret_key = 'your-secret-key'
 # Database: academy.db (NEW)
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///academy.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db = SQLAlchemy(app)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {  # Keep a pool of open connections instead of reopening the file
+    'poolclass': QueuePool,
+    'pool_size': 5,
+    'max_overflow': 10,
+    'pool_pre_ping': True,
+    'pool_recycle': 1800,
+    'connect_args': {'check_same_thread': False, 'timeout': 30},
+}
+db = SQLAlchemy(app, session_options={'expire_on_commit': False})  # Don't re-SELECT objects after every commit
+
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Runs on every new SQLite connection - WAL lets readers work while someone writes"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.execute('PRAGMA mmap_size=134217728')
+    cursor.close()
 
 # =============================================================================
 # MODELS - TEACHER EXACTLY LIKE STUDENT (EXERCISE 1)
@@ -32,7 +54,7 @@ class Teacher(db.Model):  # EXERCISE 1: Exactly like Student
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)  # Many→1 Course
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False, index=True)  # Many→1 Course
     
     def __repr__(self):
         return f'<Teacher {self.name}>'
@@ -51,27 +73,67 @@ class Student(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False, index=True)  # SQLite doesn't index FKs itself
     
     def __repr__(self):
         return f'<Student {self.name}>'
 
+# =============================================================================
+# DROPDOWN CACHE - courses/teachers rarely change, so keep their lists in memory
+# =============================================================================
+_courses_version = 0  # Bumped whenever a course is added
+_courses_cache = (-1, None)  # (version the list was built for, list of rows)
+_teachers_version = 0  # Bumped whenever a teacher is added, edited or deleted
+_teachers_cache = (-1, None)
+
+def list_courses():
+    """Courses (id, name) for the dropdowns - only re-queried after a change"""
+    global _courses_cache
+    if _courses_cache[0] != _courses_version:
+        _courses_cache = (_courses_version, db.session.query(Course.id, Course.name).all())
+    return _courses_cache[1]
+
+def list_teachers():
+    """Teachers (id, name, email) for the dropdown - only re-queried after a change"""
+    global _teachers_cache
+    if _teachers_cache[0] != _teachers_version:
+        _teachers_cache = (_teachers_version, db.session.query(Teacher.id, Teacher.name, Teacher.email).all())
+    return _teachers_cache[1]
+
+def readonly(view):
+    """Decorator for views that only read data: skip the autoflush SQLAlchemy runs before each query"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with db.session.no_autoflush:
+            return view(*args, **kwargs)
+    return wrapper
+
 # =============================================================================
 # ROUTES - FULL TEACHER CRUD (EXERCISE 1)
 # =============================================================================
 @app.route('/')
+@readonly
 def index():
     # EXERCISE 2: Students with Course + Teacher names
-    students = Student.query.join(Course).outerjoin(Teacher).order_by(desc(Student.id)).all()
+    # joinedload pulls each student's course in the same SELECT, selectinload then
+    # fetches the teachers of all those courses in ONE extra query (no N+1)
+    students = Student.query.options(
+        joinedload(Student.course).load_only(Course.id, Course.name).selectinload(Course.teachers)
+    ).order_by(desc(Student.id)).all()
     return render_template('index.html', students=students)
 
 @app.route('/teachers')
+@readonly
 def teachers():
-    teachers = Teacher.query.join(Course).order_by(Teacher.name).all()
+    # contains_eager reuses the JOIN below to fill teacher.course (no extra SELECT per teacher)
+    teachers = Teacher.query.join(Course).options(
+        contains_eager(Teacher.course).load_only(Course.id, Course.name)  # Skip the description TEXT column
+    ).order_by(Teacher.name).all()
     return render_template('teachers.html', teachers=teachers)
 
 @app.route('/add-teacher', methods=['GET', 'POST'])
 def add_teacher():
+    global _teachers_version
     if request.method == 'POST':
         name = request.form['name']
         email = request.form['email']
@@ -79,34 +141,40 @@ def add_teacher():
         new_teacher = Teacher(name=name, email=email, course_id=course_id)
         db.session.add(new_teacher)
         db.session.commit()
+        _teachers_version += 1
         flash('Teacher added successfully!', 'success')
         return redirect(url_for('teachers'))
-    courses = Course.query.all()
+    courses = list_courses()
     return render_template('add_teacher.html', courses=courses)
 
 @app.route('/edit-teacher/<int:id>', methods=['GET', 'POST'])
 def edit_teacher(id):
+    global _teachers_version
     teacher = Teacher.query.get_or_404(id)
     if request.method == 'POST':
         teacher.name = request.form['name']
         teacher.email = request.form['email']
         teacher.course_id = request.form['course_id']
         db.session.commit()
+        _teachers_version += 1
         flash('Teacher updated!', 'success')
         return redirect(url_for('teachers'))
-    courses = Course.query.all()
+    courses = list_courses()
     return render_template('edit_teacher.html', teacher=teacher, courses=courses)
 
 @app.route('/delete-teacher/<int:id>')
 def delete_teacher(id):
+    global _teachers_version
     teacher = Teacher.query.get_or_404(id)
     db.session.delete(teacher)
     db.session.commit()
+    _teachers_version += 1
     flash('Teacher deleted!', 'danger')
     return redirect(url_for('teachers'))
 
 # Student & Course routes (unchanged)
 @app.route('/courses')
+@readonly
 def courses():
     courses = Course.query.all()
     return render_template('courses.html', courses=courses)
@@ -122,7 +190,7 @@ def add_student():
         db.session.commit()
         flash('Student added!', 'success')
         return redirect(url_for('index'))
-    courses = Course.query.all()
+    courses = list_courses()
     return render_template('add.html', courses=courses)
 
 @app.route('/edit/<int:id>', methods=['GET', 'POST'])
@@ -135,7 +203,7 @@ def edit_student(id):
         db.session.commit()
         flash('Student updated!', 'success')
         return redirect(url_for('index'))
-    courses = Course.query.all()
+    courses = list_courses()
     return render_template('edit.html', student=student, courses=courses)
 
 @app.route('/delete/<int:id>')
@@ -148,6 +216,7 @@ def delete_student(id):
 
 @app.route('/add-course', methods=['GET', 'POST'])
 def add_course():
+    global _courses_version
     if request.method == 'POST':
         name = request.form['name']
         description = request.form.get('description', '')
@@ -155,19 +224,19 @@ def add_course():
         
         new_course = Course(name=name, description=description)
         db.session.add(new_course)
-        db.session.commit()
-        db.session.refresh(new_course)  # Get course ID
+        db.session.flush()  # Sends the INSERT so new_course.id is set, but doesn't commit yet
         
         # Assign teacher to course
-        teacher = Teacher.query.get(teacher_id)
+        teacher = db.session.get(Teacher, teacher_id)
         if teacher:
             teacher.course_id = new_course.id  # Link teacher to new course
-            db.session.commit()
+        db.session.commit()  # ONE commit saves both the course and the teacher change
         
+        _courses_version += 1
         flash('Course added with teacher assignment!', 'success')
         return redirect(url_for('courses'))
     
-    teachers = Teacher.query.all()  # PASS TEACHERS TO TEMPLATE
+    teachers = list_teachers()  # PASS TEACHERS TO TEMPLATE
     return render_template('add_course.html', teachers=teachers)
 
 
@@ -177,15 +246,13 @@ def add_course():
 def init_db():
     with app.app_context():
         db.create_all()
-        if Teacher.query.count() == 0:
-            # Sample Courses
+        if not db.session.query(exists().select_from(Teacher)).scalar():  # EXISTS stops at the first row, COUNT reads them all
+            # Sample Courses (explicit ids so teachers/students can point at them right away)
             courses = [
-                Course(name='Mathematics', description='Algebra & Calculus'),
-                Course(name='Physics', description='Mechanics & Electromagnetism'),
-                Course(name='Chemistry', description='Organic & Inorganic Chemistry'),
+                Course(id=1, name='Mathematics', description='Algebra & Calculus'),
+                Course(id=2, name='Physics', description='Mechanics & Electromagnetism'),
+                Course(id=3, name='Chemistry', description='Organic & Inorganic Chemistry'),
             ]
-            db.session.add_all(courses)
-            db.session.commit()
             
             # Sample Teachers (Many → 1 Course) - EXERCISE 1
             teachers = [
@@ -194,14 +261,16 @@ def init_db():
                 Teacher(name='Prof. Lisa Chen', email='lisa@academy.com', course_id=2),
                 Teacher(name='Dr. Raj Patel', email='raj@academy.com', course_id=3),
             ]
-            db.session.add_all(teachers)
             
             # Sample Students
             students = [
                 Student(name='Rahul Kumar', email='rahul@student.com', course_id=1),
                 Student(name='Priya Singh', email='priya@student.com', course_id=2),
             ]
-            db.session.add_all(students)
+            
+            # One bulk INSERT per table, all in a single transaction (one commit)
+            with db.session.no_autoflush:
+                db.session.bulk_save_objects([*courses, *teachers, *students])
             db.session.commit()
             print("✅ academy.db created with Teachers + Students + Courses!")
 
@@ -11,23 +11,78 @@ What You'll Learn:
 - Testing APIs with curl or Postman
 
 Prerequisites: Complete part-3 (SQLAlchemy)
+Install: pip install orjson
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, make_response, stream_with_context
+from flask.json.provider import JSONProvider
+from markupsafe import escape
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import and_, func, event, text, exists, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.orm import configure_mappers, joinedload, contains_eager
 from datetime import datetime
+from functools import wraps
+import gzip
+import hashlib
+import math
+import os
+import re
+import time
+import orjson  # Fast JSON library (written in Rust), understands datetime on its own
+
+class ORJSONProvider(JSONProvider):
+    """Makes jsonify() and request.get_json() use orjson instead of the json module"""
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """jsonify(): orjson already returns bytes, so skip dumps()'s decode + re-encode"""
+        if args and kwargs:
+            raise TypeError('jsonify() takes either args or kwargs, not both')
+        obj = args[0] if len(args) == 1 else (args or kwargs or None)  # jsonify(x), jsonify(a, b), jsonify(k=v)
+        return self._app.response_class(orjson.dumps(obj), mimetype='application/json')
 
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 86400  # Browsers may reuse files from /static for a day
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///library_api.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {  # Keep a pool of open connections instead of reopening the file
+    'poolclass': QueuePool,
+    'pool_size': 5,
+    'max_overflow': 10,
+    'pool_pre_ping': True,
+    'pool_recycle': 1800,
+    'connect_args': {'check_same_thread': False, 'timeout': 30},
+}
+
+db = SQLAlchemy(app, session_options={'expire_on_commit': False})  # Don't re-SELECT objects after every commit
 
-db = SQLAlchemy(app)
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Runs on every new SQLite connection - WAL lets readers work while someone writes"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA cache_size=-65536')  # 64 MB page cache (negative = size in KB)
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.execute('PRAGMA mmap_size=268435456')  # Read the file through 256 MB of memory mapping
+    cursor.execute('PRAGMA foreign_keys=ON')  # SQLite ignores FOREIGN KEY rules unless asked
+    cursor.close()
 
 # =============================================================================
 # MODELS WITH RELATIONSHIP
 # =============================================================================
 
 class Author(db.Model):
+    __table_args__ = (db.Index('ix_author_city', 'city'),)
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False, unique=True)
     bio = db.Column(db.Text)
@@ -37,20 +92,26 @@ class Author(db.Model):
     # Relationship: One author has many books
     books = db.relationship('Book', backref='author_obj', lazy=True, cascade='all, delete-orphan')
 
-    def to_dict(self):
+    def to_dict(self, book_count=None):
+        # Pass book_count when it was already counted in SQL, so we don't
+        # load every book of this author just to call len() on them
+        if book_count is None:
+            book_count = len(self.books)
         return {
             'id': self.id,
             'name': self.name,
             'bio': self.bio,
             'city': self.city,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'book_count': len(self.books)
+            'created_at': self.created_at,  # orjson writes datetimes as ISO 8601 text
+            'book_count': book_count
         }
 
 class Book(db.Model):
+    __table_args__ = (db.Index('ix_book_year', 'year'),)  # search_books filters by year
+
     id = db.Column(db.Integer, primary_key=True)
-    title = db.Column(db.String(200), nullable=False)
-    author_id = db.Column(db.Integer, db.ForeignKey('author.id'), nullable=False)
+    title = db.Column(db.String(200), nullable=False, index=True)  # ?sort=title reads this index in order
+    author_id = db.Column(db.Integer, db.ForeignKey('author.id'), nullable=False, index=True)  # SQLite doesn't index FKs itself
     year = db.Column(db.Integer)
     isbn = db.Column(db.String(20), unique=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -63,49 +124,224 @@ class Book(db.Model):
             'author_name': self.author_obj.name if self.author_obj else None,
             'year': self.year,
             'isbn': self.isbn,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
         }
 
+# Book.author_obj is a backref: it only exists once the mappers are configured.
+# Model.query did that on first use, select() doesn't - so do it now, before any request
+configure_mappers()
+
+# Columns the list endpoints may sort by. Looking the name up here (instead of
+# getattr on the model) rejects non-columns like 'books' and keeps the set of
+# possible queries small, so SQLAlchemy's compiled-SQL cache keeps hitting.
+AUTHOR_SORT_COLUMNS = {
+    'id': Author.id,
+    'name': Author.name,
+    'bio': Author.bio,
+    'city': Author.city,
+    'created_at': Author.created_at,
+}
+BOOK_SORT_COLUMNS = {
+    'id': Book.id,
+    'title': Book.title,
+    'author_id': Book.author_id,
+    'year': Book.year,
+    'isbn': Book.isbn,
+    'created_at': Book.created_at,
+}
+
+# =============================================================================
+# RESPONSE CACHE (small in-memory cache for GET endpoints)
+# =============================================================================
+
+CACHE_MAX_SIZE = 256
+_response_cache = {}  # request path + query string -> (expires_at, json_bytes)
+
+def cache_json(ttl=60):
+    """Decorator: remember a GET endpoint's successful JSON response for `ttl` seconds"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.full_path
+            cached = _response_cache.get(key)
+            if cached and cached[0] > time.monotonic():
+                return app.response_class(cached[1], mimetype='application/json')
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                if len(_response_cache) >= CACHE_MAX_SIZE:
+                    _response_cache.pop(next(iter(_response_cache), None), None)  # Drop the oldest (another thread may have already)
+                _response_cache[key] = (time.monotonic() + ttl, response.get_data())
+            return response
+        return wrapper
+    return decorator
+
+def readonly(view):
+    """Decorator for views that only read data: skip the autoflush SQLAlchemy runs before each query"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with db.session.no_autoflush:
+            return view(*args, **kwargs)
+    return wrapper
+
+def conditional_json(view):
+    """Decorator for GET list endpoints: tag the JSON with an ETag (answer 304 with
+    no body when the browser's copy is still current) and gzip it if allowed"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        response = make_response(view(*args, **kwargs))
+        if response.status_code != 200:
+            return response
+        gzipped = bool(request.accept_encodings['gzip'])
+        response.add_etag()  # Hash of the JSON text
+        if gzipped:
+            response.set_etag(response.get_etag()[0] + '-gz')  # Each encoding is its own version
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.cache_control.private = True  # Browser may keep it, but must ask before reusing it
+        response.cache_control.must_revalidate = True
+        response = response.make_conditional(request)  # 304 if If-None-Match matches
+        if gzipped and response.status_code == 200:
+            response.set_data(gzip.compress(response.get_data(), compresslevel=6))  # JSON shrinks ~5-10x
+            response.headers['Content-Encoding'] = 'gzip'
+        return response
+    return wrapper
+
+@app.after_request
+def clear_cache_after_write(response):
+    """Any successful POST/PUT/DELETE may change cached data, so forget all of it"""
+    global _index_page
+    if request.method in ('POST', 'PUT', 'PATCH', 'DELETE') and response.status_code < 400:
+        _response_cache.clear()
+        _index_page = None
+    return response
+
+# =============================================================================
+# JSON BUILT BY SQLITE (list endpoints skip ORM objects and to_dict())
+# =============================================================================
+
+AUTHOR_JSON_SQL = '''
+    SELECT json_object(
+        'id', a.id, 'name', a.name, 'bio', a.bio, 'city', a.city,
+        'created_at', replace(a.created_at, ' ', 'T'),
+        'book_count', (SELECT count(*) FROM book b WHERE b.author_id = a.id)
+    ), a.id
+    FROM author a
+'''
+
+BOOK_JSON_SQL = '''
+    SELECT json_object(
+        'id', b.id, 'title', b.title, 'author_id', b.author_id, 'author_name', a.name,
+        'year', b.year, 'isbn', b.isbn, 'created_at', replace(b.created_at, ' ', 'T')
+    ), b.id
+    FROM book b LEFT JOIN author a ON a.id = b.author_id
+'''
+
+def order_by_sql(sort_columns, sort_column, order, alias):
+    """ORDER BY clause for a whitelisted column ('' for unknown names, like before)"""
+    col = sort_columns.get(sort_column)
+    if col is None:
+        return ''
+    direction = 'DESC' if order.lower() == 'desc' else 'ASC'
+    return f' ORDER BY {alias}.{col.key} {direction}'
+
+def fetch_json_page(sql, page, per_page):
+    """Run one of the *_JSON_SQL queries for a page and return the JSON strings"""
+    result = db.session.execute(text(sql + ' LIMIT :limit OFFSET :offset'),
+                                {'limit': per_page, 'offset': (page - 1) * per_page})
+    return [row[0] for row in result]
+
+def fetch_json_after(sql, alias, after, order, per_page):
+    """Keyset ("seek") pagination: the rows whose id comes right after `after`.
+    SQLite jumps to that id through the primary key instead of skipping OFFSET rows,
+    so page 1000 is as fast as page 1. Returns (JSON strings, id to pass as the next after)"""
+    direction, compare = ('DESC', '<') if order.lower() == 'desc' else ('ASC', '>')
+    result = db.session.execute(
+        text(f'{sql} WHERE {alias}.id {compare} :after ORDER BY {alias}.id {direction} LIMIT :limit'),
+        {'after': after, 'limit': per_page}).all()
+    next_after = result[-1][1] if len(result) == per_page else None  # None = no more rows
+    return [row[0] for row in result], next_after
+
+def json_list(payload, key, rows):
+    """JSON text of payload, plus payload[key] = rows that are already JSON text"""
+    head = app.json.dumps(payload)[:-1]  # Drop the closing brace so the list can be appended
+    return f'{head},"{key}":[{",".join(rows)}]}}'
+
+def json_list_response(payload, key, rows):
+    """Like jsonify(payload), plus payload[key] = rows that are already JSON text"""
+    return app.response_class(json_list(payload, key, rows), mimetype='application/json')
+
+def stream_json_list(payload, key, stmt, to_dict):
+    """Send payload + payload[key] = [to_dict(row), ...] + "count" piece by piece,
+    so a big result is never held in memory all at once"""
+    def generate():
+        yield app.json.dumps(payload)[:-1] + f',"{key}":['
+        # Runs inside the streamed response (the view's session is gone by then)
+        # and fetches rows 200 at a time instead of all at once
+        rows = db.session.execute(stmt.execution_options(yield_per=200))
+        count = 0
+        for row in rows:
+            yield (',' if count else '') + app.json.dumps(to_dict(row))
+            count += 1
+        yield f'],"count":{count}}}'  # Count is only known at the end
+    return app.response_class(stream_with_context(generate()), mimetype='application/json')
+
 # =============================================================================
 # AUTHOR API ROUTES
 # =============================================================================
 
+def authors_with_book_count():
+    """SELECT of (author, book_count) pairs - the COUNT is done by the database"""
+    return select(Author, func.count(Book.id).label('book_count')).outerjoin(Book).group_by(Author.id)
+
 @app.route('/api/authors', methods=['GET'])
+@conditional_json
+@readonly
 def get_authors():
     sort_column = request.args.get('sort', 'id')
     order = request.args.get('order', 'asc')
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
-
-    query = Author.query
-
-    if hasattr(Author, sort_column):
-        col = getattr(Author, sort_column)
-        if order.lower() == 'desc':
-            query = query.order_by(col.desc())
-        else:
-            query = query.order_by(col.asc())
-
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-    authors = pagination.items
-
-    return jsonify({
+    page, per_page = max(page, 1), per_page if per_page > 0 else 20  # Same fallbacks as paginate()
+
+    after = request.args.get('after', type=int)  # Optional: last id of the previous page
+    if after is not None:
+        authors, next_after = fetch_json_after(AUTHOR_JSON_SQL, 'a', after, order, per_page)
+        return json_list_response({
+            'success': True,
+            'count': len(authors),
+            'sort': 'id',  # Keyset pages always follow id order
+            'order': order,
+            'after': after,
+            'next_after': next_after
+        }, 'authors', authors)
+
+    return json_list_response(*authors_page(sort_column, order, page, per_page))
+
+def authors_page(sort_column, order, page, per_page):
+    """(payload, 'authors', JSON rows) for one page of GET /api/authors"""
+    total = db.session.query(func.count(Author.id)).scalar()
+    authors = fetch_json_page(AUTHOR_JSON_SQL + order_by_sql(AUTHOR_SORT_COLUMNS, sort_column, order, 'a'),
+                              page, per_page)
+
+    return {
         'success': True,
         'count': len(authors),
-        'total_authors': pagination.total,
-        'total_pages': pagination.pages,
-        'current_page': pagination.page,
+        'total_authors': total,
+        'total_pages': math.ceil(total / per_page),
+        'current_page': page,
         'sort': sort_column,
-        'order': order,
-        'authors': [author.to_dict() for author in authors]
-    })
+        'order': order
+    }, 'authors', authors
 
 @app.route('/api/authors/<int:id>', methods=['GET'])
+@cache_json(ttl=60)
+@readonly
 def get_author(id):
-    author = Author.query.get(id)
-    if not author:
+    result = db.session.execute(authors_with_book_count().where(Author.id == id)).first()
+    if not result:
         return jsonify({'success': False, 'error': 'Author not found'}), 404
-    return jsonify({'success': True, 'author': author.to_dict()})
+    author, count = result
+    return jsonify({'success': True, 'author': author.to_dict(book_count=count)})
 
 @app.route('/api/authors', methods=['POST'])
 def create_author():
@@ -129,7 +365,7 @@ def create_author():
     return jsonify({
         'success': True,
         'message': 'Author created successfully',
-        'author': new_author.to_dict()
+        'author': new_author.to_dict(book_count=0)
     }), 201
 
 @app.route('/api/authors/<int:id>', methods=['PUT'])
@@ -170,39 +406,60 @@ def delete_author(id):
 # BOOK API ROUTES (Updated for Author relationship)
 # =============================================================================
 
+def book_integrity_error(error):
+    """Turn a failed database constraint on a book into an API error message"""
+    message = str(error.orig)
+    if 'FOREIGN KEY' in message:
+        return 'Author not found'
+    if 'UNIQUE' in message:
+        return 'ISBN already exists'
+    return 'Invalid book data'
+
 @app.route('/api/books', methods=['GET'])
+@conditional_json
+@readonly
 def get_books():
     sort_column = request.args.get('sort', 'id')
     order = request.args.get('order', 'asc')
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
-
-    query = Book.query
-
-    if hasattr(Book, sort_column):
-        col = getattr(Book, sort_column)
-        if order.lower() == 'desc':
-            query = query.order_by(col.desc())
-        else:
-            query = query.order_by(col.asc())
-
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-    books = pagination.items
-
-    return jsonify({
+    page, per_page = max(page, 1), per_page if per_page > 0 else 20  # Same fallbacks as paginate()
+
+    after = request.args.get('after', type=int)  # Optional: last id of the previous page
+    if after is not None:
+        books, next_after = fetch_json_after(BOOK_JSON_SQL, 'b', after, order, per_page)
+        return json_list_response({
+            'success': True,
+            'count': len(books),
+            'sort': 'id',  # Keyset pages always follow id order
+            'order': order,
+            'after': after,
+            'next_after': next_after
+        }, 'books', books)
+
+    return json_list_response(*books_page(sort_column, order, page, per_page))
+
+def books_page(sort_column, order, page, per_page):
+    """(payload, 'books', JSON rows) for one page of GET /api/books"""
+    total = db.session.query(func.count(Book.id)).scalar()
+    books = fetch_json_page(BOOK_JSON_SQL + order_by_sql(BOOK_SORT_COLUMNS, sort_column, order, 'b'),
+                            page, per_page)
+
+    return {
         'success': True,
         'count': len(books),
-        'total_books': pagination.total,
-        'total_pages': pagination.pages,
-        'current_page': pagination.page,
+        'total_books': total,
+        'total_pages': math.ceil(total / per_page),
+        'current_page': page,
         'sort': sort_column,
-        'order': order,
-        'books': [book.to_dict() for book in books]
-    })
+        'order': order
+    }, 'books', books
 
 @app.route('/api/books/<int:id>', methods=['GET'])
+@cache_json(ttl=60)
+@readonly
 def get_book(id):
-    book = Book.query.get(id)
+    book = Book.query.options(joinedload(Book.author_obj)).get(id)
     if not book:
         return jsonify({'success': False, 'error': 'Book not found'}), 404
     return jsonify({'success': True, 'book': book.to_dict()})
@@ -213,11 +470,6 @@ def create_book():
     if not data or not data.get('title') or not data.get('author_id'):
         return jsonify({'success': False, 'error': 'Title and author_id are required'}), 400
 
-    # Check if author exists
-    author = Author.query.get(data['author_id'])
-    if not author:
-        return jsonify({'success': False, 'error': 'Author not found'}), 400
-
     if data.get('isbn'):
         existing = Book.query.filter_by(isbn=data['isbn']).first()
         if existing:
@@ -231,7 +483,11 @@ def create_book():
     )
 
     db.session.add(new_book)
-    db.session.commit()
+    try:
+        db.session.commit()  # The database itself checks that author_id exists
+    except IntegrityError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': book_integrity_error(e)}), 400
 
     return jsonify({
         'success': True,
@@ -252,16 +508,17 @@ def update_book(id):
     if 'title' in data:
         book.title = data['title']
     if 'author_id' in data:
-        author = Author.query.get(data['author_id'])
-        if not author:
-            return jsonify({'success': False, 'error': 'Author not found'}), 400
         book.author_id = data['author_id']
     if 'year' in data:
         book.year = data['year']
     if 'isbn' in data:
         book.isbn = data['isbn']
 
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': book_integrity_error(e)}), 400
     return jsonify({
         'success': True,
         'message': 'Book updated successfully',
@@ -278,419 +535,191 @@ def delete_book(id):
     db.session.commit()
     return jsonify({'success': True, 'message': 'Book deleted successfully'})
 
+# =============================================================================
+# PAGE LOAD (one request instead of three)
+# =============================================================================
+
+@app.route('/api/bootstrap', methods=['GET'])
+@conditional_json
+@readonly
+def bootstrap():
+    """First page of books (same query params as GET /api/books) and first page
+    of authors (also used for the author dropdowns) in a single response"""
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = request.args.get('per_page', 10, type=int)
+    per_page = per_page if per_page > 0 else 20
+    books = json_list(*books_page(request.args.get('sort', 'id'), request.args.get('order', 'asc'),
+                                  page, per_page))
+    authors = json_list(*authors_page('id', 'asc', 1, 10))  # What GET /api/authors returns by default
+    return app.response_class(f'{{"success":true,"books":{books},"authors":{authors}}}',
+                              mimetype='application/json')
+
 # =============================================================================
 # SEARCH & FILTER
 # =============================================================================
 
+# Full-text search tables (SQLite FTS5). They are "external content" tables:
+# they only hold the index and point back at book/author rows by id. The trigram
+# tokenizer indexes every 3-letter piece of the text, so a substring search like
+# LIKE '%ask%' becomes an index lookup. The triggers keep the index in sync on
+# every INSERT/UPDATE/DELETE.
+SEARCH_TABLES_SQL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS book_fts USING fts5(title, tokenize='trigram', content='book', content_rowid='id')",
+    '''CREATE TRIGGER IF NOT EXISTS book_fts_insert AFTER INSERT ON book BEGIN
+           INSERT INTO book_fts(rowid, title) VALUES (new.id, new.title);
+       END''',
+    '''CREATE TRIGGER IF NOT EXISTS book_fts_delete AFTER DELETE ON book BEGIN
+           INSERT INTO book_fts(book_fts, rowid, title) VALUES ('delete', old.id, old.title);
+       END''',
+    '''CREATE TRIGGER IF NOT EXISTS book_fts_update AFTER UPDATE ON book BEGIN
+           INSERT INTO book_fts(book_fts, rowid, title) VALUES ('delete', old.id, old.title);
+           INSERT INTO book_fts(rowid, title) VALUES (new.id, new.title);
+       END''',
+    "CREATE VIRTUAL TABLE IF NOT EXISTS author_fts USING fts5(name, city, tokenize='trigram', content='author', content_rowid='id')",
+    '''CREATE TRIGGER IF NOT EXISTS author_fts_insert AFTER INSERT ON author BEGIN
+           INSERT INTO author_fts(rowid, name, city) VALUES (new.id, new.name, new.city);
+       END''',
+    '''CREATE TRIGGER IF NOT EXISTS author_fts_delete AFTER DELETE ON author BEGIN
+           INSERT INTO author_fts(author_fts, rowid, name, city) VALUES ('delete', old.id, old.name, old.city);
+       END''',
+    '''CREATE TRIGGER IF NOT EXISTS author_fts_update AFTER UPDATE ON author BEGIN
+           INSERT INTO author_fts(author_fts, rowid, name, city) VALUES ('delete', old.id, old.name, old.city);
+           INSERT INTO author_fts(rowid, name, city) VALUES (new.id, new.name, new.city);
+       END''',
+]
+
+def create_search_tables():
+    """Create the FTS tables + triggers, and index existing rows the first time"""
+    for name in ('book_fts', 'author_fts'):
+        sql = db.session.execute(text('SELECT sql FROM sqlite_master WHERE name = :name'),
+                                 {'name': name}).scalar()
+        if sql and 'trigram' not in sql:  # Older word-index version - replace it
+            db.session.execute(text(f'DROP TABLE {name}'))
+    is_new = db.session.execute(text(
+        "SELECT count(*) FROM sqlite_master WHERE name IN ('book_fts', 'author_fts')")).scalar() < 2
+    for sql in SEARCH_TABLES_SQL:
+        db.session.execute(text(sql))
+    if is_new:
+        db.session.execute(text("INSERT INTO book_fts(book_fts) VALUES ('rebuild')"))
+        db.session.execute(text("INSERT INTO author_fts(author_fts) VALUES ('rebuild')"))
+    db.session.commit()
+
+def fts_match(**columns):
+    """Build an FTS5 MATCH string where each column must contain its search text (any case),
+    e.g. fts_match(title='ask dev') -> 'title : "ask dev"'. Texts shorter than 3 characters
+    are left out - that is less than one trigram, so search those with LIKE instead"""
+    parts = []
+    for column, value in columns.items():
+        if value and len(value) >= 3:
+            parts.append(f'{column} : "' + value.replace('"', '""') + '"')  # One quoted phrase
+    return ' AND '.join(parts)
+
 @app.route('/api/books/search', methods=['GET'])
 def search_books():
-    query = Book.query
+    stmt = select(Book)
+    conditions = []  # Only the filters that were actually sent
 
     title = request.args.get('q')
-    if title:
-        query = query.filter(Book.title.ilike(f'%{title}%'))
+    match = fts_match(title=title)
+    if match:
+        # Trigram index lookup instead of scanning every title with LIKE '%...%'
+        conditions.append(text('book.id IN (SELECT rowid FROM book_fts WHERE book_fts MATCH :match)')
+                          .bindparams(match=match))
+    elif title:
+        conditions.append(Book.title.ilike(f'%{title}%'))  # Too short for the trigram index
 
     author_name = request.args.get('author')
     if author_name:
-        query = query.join(Author).filter(Author.name.ilike(f'%{author_name}%'))
+        # Already joined to Author for the filter - reuse that join to fill book.author_obj
+        stmt = stmt.join(Author).options(contains_eager(Book.author_obj))
+        conditions.append(Author.name.ilike(f'%{author_name}%'))
+    else:
+        stmt = stmt.options(joinedload(Book.author_obj))
 
-    year = request.args.get('year')
-    if year:
-        query = query.filter_by(year=int(year))
+    year = request.args.get('year', type=int)  # Not a number -> None (ignored) instead of a 500 error
+    if year is not None:
+        conditions.append(Book.year == year)  # Plain equality - SQLite looks it up in ix_book_year
 
-    books = query.all()
-    return jsonify({
-        'success': True,
-        'count': len(books),
-        'books': [book.to_dict() for book in books]
-    })
+    if conditions:
+        stmt = stmt.where(and_(*conditions))
+
+    # No pagination here, so stream the rows out as they are fetched
+    return stream_json_list({'success': True}, 'books', stmt, lambda row: row.Book.to_dict())
 
 @app.route('/api/authors/search', methods=['GET'])
 def search_authors():
-    query = Author.query
+    stmt = authors_with_book_count()
 
     name = request.args.get('q')
-    if name:
-        query = query.filter(Author.name.ilike(f'%{name}%'))
-
     city = request.args.get('city')
-    if city:
-        query = query.filter(Author.city.ilike(f'%{city}%'))
-
-    authors = query.all()
-    return jsonify({
-        'success': True,
-        'count': len(authors),
-        'authors': [author.to_dict() for author in authors]
-    })
+    match = fts_match(name=name, city=city)
+    if match:
+        stmt = stmt.where(text('author.id IN (SELECT rowid FROM author_fts WHERE author_fts MATCH :match)')
+                          .bindparams(match=match))
+    # Fall back to LIKE for search text too short for the trigram index
+    if name and not fts_match(name=name):
+        stmt = stmt.where(Author.name.ilike(f'%{name}%'))
+    if city and not fts_match(city=city):
+        stmt = stmt.where(Author.city.ilike(f'%{city}%'))
+
+    return stream_json_list({'success': True}, 'authors', stmt,
+                            lambda row: row.Author.to_dict(book_count=row.book_count))
 
 # =============================================================================
 # ENHANCED TESTING PAGE
 # =============================================================================
 
+def minify_html(html):
+    """Tiny minifier: drop HTML comments, indentation and blank lines
+    (line breaks are kept so the JavaScript still parses the same way)"""
+    html = re.sub(r'<!--.*?-->', '', html, flags=re.DOTALL)
+    return '\n'.join(line.strip() for line in html.splitlines() if line.strip())
+
+# Read and minify the page ONCE at startup
+with open(os.path.join(app.static_folder, 'index.html'), encoding='utf-8') as f:
+    INDEX_TEMPLATE = minify_html(f.read())
+AUTHOR_SELECT = '<select id="book-author-id"></select>'
+
+_index_page = None  # (expires, plain version, gzip version) - built on first request, dropped after any write
+INDEX_PAGE_TTL = 60  # Seconds; with several worker processes a write only clears the cache of its own process
+
+def page_version(body, etag, encoding=None):
+    """(etag, body, 304 headers, 200 headers) for one encoding of the page - headers are built once too"""
+    cache_headers = {
+        'Vary': 'Accept-Encoding',
+        'ETag': f'"{etag}"',
+        # The page includes the author list, so browsers must ask "still the same?" each time
+        'Cache-Control': 'no-cache',
+    }
+    headers = {**cache_headers, 'Content-Type': 'text/html; charset=utf-8', 'Content-Length': str(len(body))}
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return etag, body, cache_headers, headers
+
+def index_page():
+    """The page with the author dropdown already filled in, so it shows without waiting for JS"""
+    global _index_page
+    if _index_page is None or _index_page[0] < time.monotonic():
+        # Same authors as the first page of GET /api/authors, which the JS uses afterwards
+        authors = db.session.execute(select(Author.id, Author.name).order_by(Author.id).limit(10))
+        options = ''.join(f'<option value="{a.id}">{escape(a.name)}</option>' for a in authors)
+        html = INDEX_TEMPLATE.replace(AUTHOR_SELECT, AUTHOR_SELECT.replace('><', f'>{options}<')).encode('utf-8')
+        etag = hashlib.md5(html).hexdigest()
+        _index_page = (time.monotonic() + INDEX_PAGE_TTL,
+                       page_version(html, etag),
+                       page_version(gzip.compress(html, compresslevel=9), etag + '-gz', 'gzip'))
+    return _index_page
+
 @app.route('/')
+@readonly
 def index():
-    return '''
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Library API Manager</title>
-        <style>
-            body { font-family: 'Segoe UI', sans-serif; margin: 20px; background: #1a1a2e; color: #eee; }
-            .container { max-width: 1200px; margin: auto; }
-            h1 { color: #e94560; border-bottom: 2px solid #e94560; padding-bottom: 10px; }
-            .section { background: #16213e; padding: 20px; border-radius: 8px; margin-bottom: 20px; box-shadow: 0 4px 6px rgba(0,0,0,0.3); }
-            input, select { padding: 8px; margin: 5px; border-radius: 4px; border: none; background: #0f3460; color: white; }
-            button { padding: 8px 15px; border-radius: 4px; border: none; cursor: pointer; font-weight: bold; margin: 2px; }
-            .btn-primary { background: #27ae60; color: white; }
-            .btn-secondary { background: #3498db; color: white; }
-            .btn-danger { background: #e74c3c; color: white; }
-            table { width: 100%; border-collapse: collapse; margin-top: 20px; }
-            th { text-align: left; background: #0f3460; padding: 12px; }
-            td { padding: 12px; border-bottom: 1px solid #0f3460; }
-            .tab { display: none; }
-            .tab.active { display: block; }
-            .tab-btn { background: #0f3460; color: white; padding: 10px 20px; border: none; cursor: pointer; margin-right: 5px; }
-            .tab-btn.active { background: #e94560; }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h1>📚 Library API Manager</h1>
-            
-            <div style="margin-bottom: 20px;">
-                <button class="tab-btn active" onclick="showTab('books')">Books</button>
-                <button class="tab-btn" onclick="showTab('authors')">Authors</button>
-            </div>
-
-            <!-- Books Tab -->
-            <div id="books" class="tab active">
-                <div class="section">
-                    <h3>Add New Book</h3>
-                    <select id="book-author-id"></select>
-                    <input type="text" id="book-title" placeholder="Title">
-                    <input type="number" id="book-year" placeholder="Year">
-                    <input type="text" id="book-isbn" placeholder="ISBN">
-                    <button class="btn-primary" onclick="addBook()">Add Book</button>
-                </div>
-                <div class="section">
-                    <h3>Books <small>(?page=1&per_page=5&sort=title&order=desc)</small></h3>
-                    <div style="margin-bottom: 10px;">
-                        <input type="number" id="page" value="1" style="width:60px"> 
-                        <input type="number" id="per_page" value="10" style="width:80px">
-                        <input type="text" id="sort" value="id" style="width:80px">
-                        <input type="text" id="order" value="asc" style="width:60px">
-                        <button class="btn-secondary" onclick="fetchBooks()">Refresh</button>
-                    </div>
-                <div style="margin-bottom: 10px;">
-                        <input type="text" id="search-title" placeholder="Search title">
-                        <input type="text" id="search-author" placeholder="Author name">
-                        <input type="number" id="search-year" placeholder="Year" style="width:80px">
-                        <button class="btn-secondary" onclick="searchBooks()">Search</button>
-                        <button class="btn-danger" onclick="fetchBooks()">Clear</button>
-                    </div>
-
-                    <table>
-                        <thead>
-                            <tr>
-                                <th>ID</th><th>Title</th><th>Author</th><th>Year</th><th>ISBN</th><th>Actions</th>
-                            </tr>
-                        </thead>
-                        <tbody id="book-table"></tbody>
-                    </table>
-                </div>
-            </div>
-
-            <!-- Authors Tab -->
-            <div id="authors" class="tab">
-                <div class="section">
-                    <h3>Add New Author</h3>
-                    <input type="text" id="author-name" placeholder="Name">
-                    <input type="text" id="author-city" placeholder="City">          
-                    <button class="btn-primary" onclick="addAuthor()">Add Author</button>
-                </div>
-            <div style="margin-bottom: 10px;">
-                    <input type="text" id="search-author-name" placeholder="Author name">
-                    <input type="text" id="search-author-city" placeholder="City">
-                    <button class="btn-secondary" onclick="searchAuthors()">Search</button>
-                    <button class="btn-danger" onclick="fetchAuthors()">Clear</button>
-                </div>
-
-                <div class="section">
-                    <h3>Authors</h3>
-                    <table>
-                        <thead>
-                            <tr>
-                                <th>ID</th><th>Name</th><th>City</th><th>Book Count</th><th>Actions</th>
-                            </tr>
-                        </thead>
-                        <tbody id="author-table"></tbody>
-                    </table>
-                </div>
-            </div>
-        </div>
-
-        <script>
-            let authors = [];
-
-            async function loadAuthors() {
-                const response = await fetch('/api/authors');
-                const data = await response.json();
-                authors = data.authors;
-                const authorSelect = document.getElementById('book-author-id');
-                authorSelect.innerHTML = authors.map(a => 
-                    `<option value="${a.id}">${a.name}</option>`
-                ).join('');
-            }
-
-            async function fetchBooks() {
-                const page = document.getElementById('page').value;
-                const per_page = document.getElementById('per_page').value;
-                const sort = document.getElementById('sort').value;
-                const order = document.getElementById('order').value;
-                
-                const url = `/api/books?page=${page}&per_page=${per_page}&sort=${sort}&order=${order}`;
-                const response = await fetch(url);
-                const data = await response.json();
-                
-                const tableBody = document.getElementById('book-table');
-                tableBody.innerHTML = data.books.map(book => `
-                    <tr id="row-${book.id}">
-                        <td>${book.id}</td>
-                        <td class="title-cell">${book.title}</td>
-                        <td>${book.author_name}</td>
-                        <td>${book.year || ''}</td>
-                        <td>${book.isbn || ''}</td>
-                        <td>
-                            <button class="btn-secondary" onclick="editBook(${book.id})">Edit</button>
-                            <button class="btn-danger" onclick="deleteBook(${book.id})">Delete</button>
-                        </td>
-                    </tr>
-                `).join('');
-            }
-
-            async function fetchAuthors() {
-                const response = await fetch('/api/authors');
-                const data = await response.json();
-                const tableBody = document.getElementById('author-table');
-                tableBody.innerHTML = data.authors.map(author => `
-                    <tr id="author-row-${author.id}">
-                        <td>${author.id}</td>
-                        <td>${author.name}</td>
-                        <td>${author.city || ''}</td>
-                        <td>${author.book_count}</td>
-                        <td>
-                            <button class="btn-secondary" onclick="editAuthor(${author.id})">Edit</button>
-                            <button class="btn-danger" onclick="deleteAuthor(${author.id})">Delete</button>
-                        </td>
-                    </tr>
-                `).join('');
-            }
-
-            async function addBook() {
-                const data = {
-                    title: document.getElementById('book-title').value,
-                    author_id: parseInt(document.getElementById('book-author-id').value),
-                    year: parseInt(document.getElementById('book-year').value) || null,
-                    isbn: document.getElementById('book-isbn').value
-                };
-                await fetch('/api/books', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify(data)
-                });
-                document.getElementById('book-title').value = '';
-                document.getElementById('book-year').value = '';
-                document.getElementById('book-isbn').value = '';
-                fetchBooks();
-            }
-
-            async function addAuthor() {
-                const data = {
-                    name: document.getElementById('author-name').value,
-                    city: document.getElementById('author-city').value,
-                    bio: document.getElementById('author-bio').value
-                };
-                await fetch('/api/authors', {
-                    method: 'POST',
-                    headers: {'Content-Type': 'application/json'},
-                    body: JSON.stringify(data)
-                });
-                document.getElementById('author-name').value = '';
-                document.getElementById('author-city').value = '';
-                document.getElementById('author-bio').value = '';
-                await loadAuthors();
-                fetchAuthors();
-            }
-
-            async function deleteBook(id) {
-                if (confirm('Delete this book?')) {
-                    await fetch(`/api/books/${id}`, {method: 'DELETE'});
-                    fetchBooks();
-                }
-            }
-
-            async function deleteAuthor(id) {
-                if (confirm('Delete this author and all their books?')) {
-                    await fetch(`/api/authors/${id}`, {method: 'DELETE'});
-                    await loadAuthors();
-                    fetchAuthors();
-                }
-            }
-            
-            function editBook(id) {
-    const row = document.getElementById(`row-${id}`);
-    const book = {
-        title: row.children[1].innerText,
-        author: row.children[2].innerText,
-        year: row.children[3].innerText,
-        isbn: row.children[4].innerText
-    };
-
-    row.innerHTML = `
-        <td>${id}</td>
-        <td><input value="${book.title}" id="title-${id}"></td>
-        <td>
-            <select id="author-${id}">
-                ${authors.map(a =>
-                    `<option value="${a.id}" ${a.name === book.author ? 'selected' : ''}>
-                        ${a.name}
-                    </option>`
-                ).join('')}
-            </select>
-        </td>
-        <td><input type="number" value="${book.year}" id="year-${id}"></td>
-        <td><input value="${book.isbn}" id="isbn-${id}"></td>
-        <td>
-            <button class="btn-primary" onclick="saveBook(${id})">Save</button>
-            <button class="btn-danger" onclick="fetchBooks()">Cancel</button>
-        </td>
-    `;
-}
-
-        async function saveBook(id) {
-    const data = {
-        title: document.getElementById(`title-${id}`).value,
-        author_id: parseInt(document.getElementById(`author-${id}`).value),
-        year: parseInt(document.getElementById(`year-${id}`).value) || null,
-        isbn: document.getElementById(`isbn-${id}`).value
-    };
-
-    await fetch(`/api/books/${id}`, {
-        method: 'PUT',
-        headers: {'Content-Type': 'application/json'},
-        body: JSON.stringify(data)
-    });
-
-    fetchBooks();
-}
-
-            function editAuthor(id) {
-    const row = document.getElementById(`author-row-${id}`);
-    const name = row.children[1].innerText;
-    const city = row.children[2].innerText;
-
-    row.innerHTML = `
-        <td>${id}</td>
-        <td><input value="${name}" id="name-${id}"></td>
-        <td><input value="${city}" id="city-${id}"></td>
-        <td>-</td>
-        <td>
-            <button class="btn-primary" onclick="saveAuthor(${id})">Save</button>
-            <button class="btn-danger" onclick="fetchAuthors()">Cancel</button>
-        </td>
-    `;
-}
-
-       async function saveAuthor(id) {
-    const data = {
-        name: document.getElementById(`name-${id}`).value,
-        city: document.getElementById(`city-${id}`).value
-    };
-
-    await fetch(`/api/authors/${id}`, {
-        method: 'PUT',
-        headers: {'Content-Type': 'application/json'},
-        body: JSON.stringify(data)
-    });
-
-    fetchAuthors();
-    loadAuthors();
-}
-
-        async function searchBooks() {
-    const title = document.getElementById('search-title').value;
-    const author = document.getElementById('search-author').value;
-    const year = document.getElementById('search-year').value;
-
-    let url = `/api/books/search?`;
-
-    if (title) url += `q=${encodeURIComponent(title)}&`;
-    if (author) url += `author=${encodeURIComponent(author)}&`;
-    if (year) url += `year=${year}&`;
-
-    const response = await fetch(url);
-    const data = await response.json();
-
-    const tableBody = document.getElementById('book-table');
-    tableBody.innerHTML = data.books.map(book => `
-        <tr id="row-${book.id}">
-            <td>${book.id}</td>
-            <td>${book.title}</td>
-            <td>${book.author_name}</td>
-            <td>${book.year || ''}</td>
-            <td>${book.isbn || ''}</td>
-            <td>
-                <button class="btn-secondary" onclick="editBook(${book.id})">Edit</button>
-                <button class="btn-danger" onclick="deleteBook(${book.id})">Delete</button>
-            </td>
-        </tr>
-    `).join('');
-}
- 
-        async function searchAuthors() {
-    const name = document.getElementById('search-author-name').value;
-    const city = document.getElementById('search-author-city').value;
-
-    let url = `/api/authors/search?`;
-
-    if (name) url += `q=${encodeURIComponent(name)}&`;
-    if (city) url += `city=${encodeURIComponent(city)}&`;
-
-    const response = await fetch(url);
-    const data = await response.json();
-
-    const tableBody = document.getElementById('author-table');
-    tableBody.innerHTML = data.authors.map(author => `
-        <tr id="author-row-${author.id}">
-            <td>${author.id}</td>
-            <td>${author.name}</td>
-            <td>${author.city || ''}</td>
-            <td>${author.book_count}</td>
-            <td>
-                <button class="btn-secondary" onclick="editAuthor(${author.id})">Edit</button>
-                <button class="btn-danger" onclick="deleteAuthor(${author.id})">Delete</button>
-            </td>
-        </tr>
-    `).join('');
-}
-
-            function showTab(tabName) {
-                document.querySelectorAll('.tab').forEach(tab => tab.classList.remove('active'));
-                document.querySelectorAll('.tab-btn').forEach(btn => btn.classList.remove('active'));
-                document.getElementById(tabName).classList.add('active');
-                event.target.classList.add('active');
-            }
-
-            // Initialize
-            loadAuthors().then(() => {
-                fetchBooks();
-                fetchAuthors();
-            });
-        </script>
-    </body>
-    </html>
-    '''
+    _, plain, gzipped = index_page()
+    # Browser said "Accept-Encoding: gzip"? Each encoding is its own version (and ETag) of the page
+    etag, body, cache_headers, headers = gzipped if request.accept_encodings['gzip'] else plain
+    if etag in request.if_none_match:  # Browser already has this exact page
+        return Response(status=304, headers=cache_headers)  # 304 Not Modified - no body sent
+    # Ready-made bytes and headers: direct_passthrough tells Werkzeug to send them as they are
+    return Response(body, headers=headers, direct_passthrough=True)
 
 # =============================================================================
 # INITIALIZE DATABASE
@@ -699,8 +728,9 @@ def index():
 def init_db():
     with app.app_context():
         db.create_all()
+        create_search_tables()
         
-        if Author.query.count() == 0:
+        if not db.session.query(exists().select_from(Author)).scalar():  # Empty table?
             # Sample authors
             authors_data = [
                 {'name': 'Eric Matthes', 'city': 'USA', 'bio': 'Python educator'},
@@ -708,11 +738,9 @@ def init_db():
                 {'name': 'Robert C. Martin', 'city': 'USA', 'bio': 'Clean Code author'}
             ]
             
-            for data in authors_data:
-                author = Author(**data)
-                db.session.add(author)
-            
-            db.session.commit()
+            # One executemany INSERT from the dicts - no Author objects to build and track
+            db.session.bulk_insert_mappings(Author, authors_data)
+            db.session.flush()  # Authors get ids 1-3 before the books point at them
             
             # Sample books
             books_data = [
@@ -721,11 +749,8 @@ def init_db():
                 {'title': 'Clean Code', 'author_id': 3, 'year': 2008, 'isbn': '978-0132350884'},
             ]
             
-            for data in books_data:
-                book = Book(**data)
-                db.session.add(book)
-            
-            db.session.commit()
+            db.session.bulk_insert_mappings(Book, books_data)
+            db.session.commit()  # One transaction for authors + books
             print('✅ Database initialized with sample data!')
 
 if __name__ == '__main__':
@@ -735,7 +760,9 @@ if __name__ == '__main__':
     print("   GET /api/books?page=1&per_page=5&sort=title&order=desc")
     print("   GET /api/authors")
     print("   POST /api/books (JSON body required)")
-    app.run(debug=True)
+    # Debug mode (auto-reload + in-browser debugger) only when asked: FLASK_DEBUG=1 python app.py
+    # In production use a real WSGI server instead: gunicorn -w 4 -k gthread --threads 8 -b :5000 app:app
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1')
 
 
 # =============================================================================
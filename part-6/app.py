@@ -6,12 +6,18 @@ See Instruction.md for full requirements and hints.
 How to Run:
 1. Make sure venv is activated
 2. Install: pip install flask flask-sqlalchemy
-3. Run: python app.py
+3. Run: python app.py  (FLASK_DEBUG=1 python app.py for auto-reload + debugger)
 4. Open browser: http://localhost:5000
+
+Production: run python app.py once to create the database, then
+gunicorn -w 4 -k gthread --threads 8 -b :5000 app:app
 """
 
 from flask import Flask, render_template, request, redirect, url_for, flash
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, exists, text
+from sqlalchemy.engine import Engine
+import os
 
 app = Flask(__name__)
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///inventory.db'
@@ -20,6 +26,17 @@ app.secret_key = 'supersecretkey'  # required for flash messages
 
 db = SQLAlchemy(app)
 
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Runs on every new SQLite connection - WAL lets readers work while someone writes"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA cache_size=-65536')  # 64 MB page cache (negative = size in KB)
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.execute('PRAGMA mmap_size=268435456')  # Read the file through 256 MB of memory mapping
+    cursor.close()
+
 # ===========================
 # Product Model
 # ===========================
@@ -29,6 +46,53 @@ class Product(db.Model):
     quantity = db.Column(db.Integer, default=0)
     price = db.Column(db.Float, nullable=False)
 
+# ===========================
+# Full-text search (SQLite FTS5)
+# ===========================
+# product_fts indexes every 3-letter piece ("trigram") of product.name, so a
+# substring search like '%phone%' is an index lookup instead of a scan of every
+# name. The triggers keep it in sync with the product table.
+SEARCH_TABLE_SQL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5(name, tokenize='trigram', content='product', content_rowid='id')",
+    '''CREATE TRIGGER IF NOT EXISTS product_fts_insert AFTER INSERT ON product BEGIN
+           INSERT INTO product_fts(rowid, name) VALUES (new.id, new.name);
+       END''',
+    '''CREATE TRIGGER IF NOT EXISTS product_fts_delete AFTER DELETE ON product BEGIN
+           INSERT INTO product_fts(product_fts, rowid, name) VALUES ('delete', old.id, old.name);
+       END''',
+    '''CREATE TRIGGER IF NOT EXISTS product_fts_update AFTER UPDATE ON product BEGIN
+           INSERT INTO product_fts(product_fts, rowid, name) VALUES ('delete', old.id, old.name);
+           INSERT INTO product_fts(rowid, name) VALUES (new.id, new.name);
+       END''',
+]
+
+def create_search_table():
+    """Create product_fts + triggers, and index the existing products the first time"""
+    existing = db.session.execute(text("SELECT sql FROM sqlite_master WHERE name = 'product_fts'")).scalar()
+    if existing and 'trigram' not in existing:  # Older word-index version - replace it
+        db.session.execute(text('DROP TABLE product_fts'))
+    is_new = not existing or 'trigram' not in existing
+    for sql in SEARCH_TABLE_SQL:
+        db.session.execute(text(sql))
+    if is_new:
+        db.session.execute(text("INSERT INTO product_fts(product_fts) VALUES ('rebuild')"))
+    db.session.commit()
+
+def search_filters(search):
+    """Filters for the search box: the name contains the search text (any case)"""
+    if not search:
+        return []
+    if len(search) < 3:  # Shorter than one trigram - the index can't help, plain LIKE instead
+        return [Product.name.ilike(f'%{search}%')]
+    match = '"' + search.replace('"', '""') + '"'  # One quoted phrase = the exact text, anywhere in the name
+    return [text('product.id IN (SELECT rowid FROM product_fts WHERE product_fts MATCH :match)')
+            .bindparams(match=match)]
+
+# Done at import (not only under __main__) so `flask run` and gunicorn get the tables too
+with app.app_context():
+    db.create_all()
+    create_search_table()
+
 # ===========================
 # Routes
 # ===========================
@@ -37,13 +101,17 @@ class Product(db.Model):
 @app.route('/', methods=['GET', 'POST'])
 def index():
     query = request.args.get('search', '')
-    if query:
-        products = Product.query.filter(Product.name.ilike(f'%{query}%')).all()
-    else:
-        products = Product.query.all()
+    filters = search_filters(query)
+
+    # Only the columns the table shows - light rows instead of full Product objects
+    products = db.session.query(Product.id, Product.name, Product.quantity, Product.price) \
+        .filter(*filters).all()
 
-    total_quantity = sum(p.quantity for p in products)
-    total_value = sum(p.quantity * p.price for p in products)
+    # Let the database add up the totals in one query
+    total_quantity, total_value = db.session.query(
+        db.func.coalesce(db.func.sum(Product.quantity), 0),
+        db.func.coalesce(db.func.sum(Product.quantity * Product.price), 0)
+    ).filter(*filters).one()
 
     return render_template('index.html', products=products, total_quantity=total_quantity,
                            total_value=total_value, search=query)
@@ -92,17 +160,16 @@ def delete_product(product_id):
 # ===========================
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
-        if Product.query.count() == 0:
+        if not db.session.query(exists().select_from(Product)).scalar():
             sample_products = [
-                Product(name="Apple iPhone 14", quantity=10, price=999.99),
-                Product(name="Samsung Galaxy S23", quantity=8, price=899.99),
-                Product(name="Dell XPS 13 Laptop", quantity=5, price=1199.99),
-                Product(name="Sony WH-1000XM5 Headphones", quantity=15, price=349.99),
-                Product(name="Logitech MX Master 3 Mouse", quantity=20, price=99.99)
+                {'name': "Apple iPhone 14", 'quantity': 10, 'price': 999.99},
+                {'name': "Samsung Galaxy S23", 'quantity': 8, 'price': 899.99},
+                {'name': "Dell XPS 13 Laptop", 'quantity': 5, 'price': 1199.99},
+                {'name': "Sony WH-1000XM5 Headphones", 'quantity': 15, 'price': 349.99},
+                {'name': "Logitech MX Master 3 Mouse", 'quantity': 20, 'price': 99.99}
             ]
-            db.session.add_all(sample_products)
+            db.session.bulk_insert_mappings(Product, sample_products)  # One executemany INSERT
             db.session.commit()
             print("✅ Sample products added")
 
-    app.run(debug=True)
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1')  # Debug mode only when asked